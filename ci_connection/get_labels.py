@@ -27,7 +27,9 @@ The script is only geared towards use within a GH Action run.
 import json
 import logging
 import os
+import random
 import re
+import tempfile
 import time
 import traceback
 import urllib.request
@@ -35,6 +37,22 @@ import urllib.error
 
 _GITHUB_API_VERSION = "2022-11-28"
 
+# Events that run on a PR's merge ref (refs/pull/N/merge), from which the PR number
+# is taken. Others skip the API lookup entirely. Note that `pull_request_target`
+# runs on the base branch's ref, so its PR can't be found this way
+_PR_EVENT_NAMES = frozenset({
+  "pull_request",
+  "pull_request_review",
+  "pull_request_review_comment",
+})
+
+# Retry wait bounds, in seconds
+_BASE_RETRY_WAIT = 0.5
+_MAX_RETRY_WAIT = 30
+
+# File in $RUNNER_TEMP, for making conditional requests for the labels
+_LABELS_CACHE_FILENAME = "labels_cache.json"
+
 
 def _get_label_request_headers() -> dict[str, str]:
   headers = {
@@ -50,12 +68,59 @@ def _get_label_request_headers() -> dict[str, str]:
   return headers
 
 
+def _read_cached_labels(labels_url: str) -> tuple[str, str] | None:
+  """Return the (ETag, body) of a previous labels response for `labels_url`, if any."""
+  runner_temp = os.getenv("RUNNER_TEMP")
+  if not runner_temp:
+    return None
+  try:
+    with open(
+      os.path.join(runner_temp, _LABELS_CACHE_FILENAME), "r", encoding="utf-8"
+    ) as f:
+      cached = json.load(f)
+    # Responses for a different PR (or repo) must never be reused
+    if cached["url"] != labels_url:
+      return None
+    etag, body = cached["etag"], cached["body"]
+  except (OSError, ValueError, KeyError, TypeError):
+    return None
+
+  if not etag or not body:
+    return None
+  return etag, body
+
+
+def _save_cached_labels(labels_url: str, etag: str | None, body: str):
+  """Save the labels response, so that later requests can be conditional."""
+  runner_temp = os.getenv("RUNNER_TEMP")
+  if not runner_temp or not etag:
+    return
+  cache_path = os.path.join(runner_temp, _LABELS_CACHE_FILENAME)
+  tmp_path = None
+  try:
+    # The ETag and the body are written together, and swapped in atomically,
+    # so that an ETag can never be paired with a stale or partial body
+    fd, tmp_path = tempfile.mkstemp(dir=runner_temp, prefix=".labels_cache")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+      json.dump({"url": labels_url, "etag": etag, "body": body}, f)
+    os.replace(tmp_path, cache_path)
+  except OSError as e:
+    logging.debug(f"Could not cache the labels response: {e}")
+    if tmp_path:
+      try:
+        os.remove(tmp_path)
+      except OSError:
+        pass
+
+
 def _wait_before_repeat_request(cur_attempt: int, total_attempts: int):
   if cur_attempt > total_attempts:
     return
-  wait_time = 2 * (2 ** (cur_attempt - 2))
+  # Exponential backoff, with jitter to spread out retries from parallel jobs
+  wait_time = min(_MAX_RETRY_WAIT, _BASE_RETRY_WAIT * (2 ** (cur_attempt - 1)))
+  wait_time += random.uniform(0, 0.5)
   logging.info(
-    f"Trying again in {wait_time} seconds (Attempt {cur_attempt}/{total_attempts})"
+    f"Trying again in {wait_time:.1f} seconds (Attempt {cur_attempt}/{total_attempts})"
   )
   time.sleep(wait_time)
 
@@ -84,6 +149,12 @@ def _get_labels_via_api(gh_issue: str) -> list | None:
 
   headers = _get_label_request_headers()
 
+  # Make the request conditional - an unchanged label set results in a 304,
+  # with an empty body, and the previously saved response is used instead
+  cached_labels = _read_cached_labels(labels_url)
+  if cached_labels:
+    headers["If-None-Match"] = cached_labels[0]
+
   while cur_attempt <= total_attempts:
     request = urllib.request.Request(labels_url, headers=headers)
     logging.info(f"Retrieving PR labels via API - attempt {cur_attempt}...")
@@ -99,11 +170,17 @@ def _get_labels_via_api(gh_issue: str) -> list | None:
       if response.status == 200:
         data = response.read().decode("utf-8")
         logging.debug(f"API labels data: \n{data}")
+        _save_cached_labels(labels_url, response.headers.get("ETag"), data)
         break
 
     except urllib.error.HTTPError as e:
       _log_rate_limit(e, rate_limit_logged, authentication_type)
 
+      if e.code == 304 and cached_labels:
+        data = cached_labels[1]
+        logging.debug(f"Labels not modified (304), using cached data: \n{data}")
+        break
+
       if e.code == 404:
         # A 404 means the repo/PR doesn't exist, or, the token has
         # zero access as the repo is private - no sense in retrying anonymously
@@ -242,7 +319,8 @@ def retrieve_labels(print_to_stdout: bool = True) -> list[str] | None:
     )
 
   # Outside a PR context - no labels to be found
-  if not github_ref.startswith("refs/pull/"):
+  event_name = os.getenv("GITHUB_EVENT_NAME")
+  if event_name not in _PR_EVENT_NAMES or not github_ref.startswith("refs/pull/"):
     logging.debug("Not a PR workflow run, returning an empty label list")
     if print_to_stdout:
       print([])
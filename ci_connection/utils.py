@@ -19,7 +19,7 @@ import logging
 import os
 import platform
 import sys
-from datetime import datetime
+import time
 
 
 class ConnectionSignals:
@@ -28,6 +28,12 @@ class ConnectionSignals:
   KEEP_ALIVE: str = "keep_alive"
   ENV_STATE_REQUESTED: str = "env_state_requested"
 
+  # Encoded forms, for comparing against raw messages without decoding them
+  CONNECTION_ESTABLISHED_B: bytes = CONNECTION_ESTABLISHED.encode()
+  CONNECTION_CLOSED_B: bytes = CONNECTION_CLOSED.encode()
+  KEEP_ALIVE_B: bytes = KEEP_ALIVE.encode()
+  ENV_STATE_REQUESTED_B: bytes = ENV_STATE_REQUESTED.encode()
+
 
 # Default path constants for saving/reading execution state
 STATE_OUT_DIR = os.path.join(os.path.expandvars("$HOME"), ".workflow_state")
@@ -76,9 +82,8 @@ class _ColoredFormatter(logging.Formatter):
     super().format(record)
     colored_text = self.style_text(f"{record.levelname}: {record.msg}", record)
     record.msg = self.style_text(record.msg, record)
-    file_name = record.filename.removesuffix(".py")
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    out = f"[{file_name}] {timestamp} {colored_text}"
+    timestamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+    out = f"[{record.module}] {timestamp} {colored_text}"
     if record.exc_text:
       out += f"\n{self.style_text(record.exc_text, record)}"
     return out
@@ -94,6 +99,8 @@ class _ColoredFormatter(logging.Formatter):
       styles.append(_ANSI["UNDERLINE"])
     styles = "".join(styles)
 
+    if "\n" not in text:
+      return f"{styles}{text}{_ANSI['RESET']}"
     lines = text.split("\n")
     out = [f"{styles}{line}{_ANSI['RESET']}" for line in lines]
     return "\n".join(out)
@@ -112,11 +119,7 @@ def setup_logging():
   return logger
 
 
-def is_linux_or_linux_like_shell():
-  """
-  Returns True if Python is running on an actual Linux system
-  or in a Linux-like shell (MSYS2, Git Bash, Cygwin, etc.).
-  """
+def _check_linux_or_linux_like_shell() -> bool:
   # Check if the operating system is Linux
   if platform.system() == "Linux":
     return True
@@ -125,9 +128,20 @@ def is_linux_or_linux_like_shell():
   ostype = os.environ.get("OSTYPE", "").lower()
   msystem = os.environ.get("MSYSTEM", "").lower()
 
-  if any(token in ostype for token in {"linux-gnu", "msys", "cygwin"}):
+  if any(token in ostype for token in ("linux-gnu", "msys", "cygwin")):
     return True
-  if any(token in msystem for token in {"mingw", "msys"}):
+  if any(token in msystem for token in ("mingw", "msys")):
     return True
 
   return False
+
+
+_IS_LINUX_OR_LINUX_LIKE_SHELL = _check_linux_or_linux_like_shell()
+
+
+def is_linux_or_linux_like_shell():
+  """
+  Returns True if Python is running on an actual Linux system
+  or in a Linux-like shell (MSYS2, Git Bash, Cygwin, etc.).
+  """
+  return _IS_LINUX_OR_LINUX_LIKE_SHELL
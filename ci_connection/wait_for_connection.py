@@ -15,10 +15,10 @@
 """Wait for a remote connection from a user, if a wait was requested."""
 
 import asyncio
+import functools
 import json
 import logging
 import os
-import shutil
 import sys
 import time
 import platform
@@ -39,6 +39,8 @@ HALT_ALWAYS_LABEL = "CI Connection Halt - Always"
 HALT_ON_RETRY_LABEL = "CI Connection Halt - On Retry"
 HALT_ON_ERROR_LABEL = "CI Connection Halt - On Error"
 
+_IS_WINDOWS = platform.system() == "Windows"
+
 
 def _get_run_attempt_num() -> int | None:
   try:
@@ -53,10 +55,14 @@ def _get_run_attempt_num() -> int | None:
 _RUN_ATTEMPT = _get_run_attempt_num()  # The workflow (re-)run number
 
 
+_NEGATIVE_CHOICES = frozenset({"0", "false", "n", "no", "none", "null", "n/a"})
+
+
+# Env vars don't change during the lifetime of the process
+@functools.lru_cache(maxsize=None)
 def _is_true_like_env_var(var_name: str) -> bool:
   var_val = os.getenv(var_name, "").lower()
-  negative_choices = {"0", "false", "n", "no", "none", "null", "n/a"}
-  if var_val and var_val not in negative_choices:
+  if var_val and var_val not in _NEGATIVE_CHOICES:
     return True
   return False
 
@@ -201,39 +207,53 @@ class WaitInfo:
   last_time = time.time()
   waiting_for_close = False
   stop_event = asyncio.Event()
+  # The filtered env response, computed on first request
+  env_state_response: bytes | None = None
 
 
 async def process_messages(reader, writer):
-  data = await reader.read(1024)
-  # Since this is a stream, multiple messages could come in at once
-  messages = [m for m in data.decode().strip().splitlines() if m]
-  for message in messages:
-    if message == ConnectionSignals.KEEP_ALIVE:
+  # Messages are newline-delimited, and are handled one line at a time,
+  # until the client closes its side of the connection
+  async for line in reader:
+    message = line.strip()
+    if not message:
+      continue
+    if message == ConnectionSignals.KEEP_ALIVE_B:
       logging.info("Keep-alive received")
       WaitInfo.last_time = time.time()
-    elif message == ConnectionSignals.CONNECTION_CLOSED:
+    elif message == ConnectionSignals.CONNECTION_CLOSED_B:
       WaitInfo.waiting_for_close = True
       WaitInfo.stop_event.set()
-    elif message == ConnectionSignals.CONNECTION_ESTABLISHED:
+      # Stop reading right away, rather than waiting for the client's EOF, so that
+      # the handler is not still pending (and cancelled) when the server shuts down
+      break
+    elif message == ConnectionSignals.CONNECTION_ESTABLISHED_B:
       WaitInfo.last_time = time.time()
       WaitInfo.timeout = WaitInfo.re_connect_timeout
       logging.info("Remote connection detected.")
-    elif message == ConnectionSignals.ENV_STATE_REQUESTED:
+    elif message == ConnectionSignals.ENV_STATE_REQUESTED_B:
       logging.info(
         "Environment state requested (to disable on next time, add `--no-env` to command)"
       )
       # Send the JSON dump of os.environ
-      env_data = preserve_run_state.save_env_state(out_path=None)
-      json_data = json.dumps(env_data)
+      if WaitInfo.env_state_response is None:
+        env_data = preserve_run_state.save_env_state(
+          out_path=None, env=dict(os.environ)
+        )
+        WaitInfo.env_state_response = f"{json.dumps(env_data)}\n".encode()
       # Send the data back to the client
-      writer.write((json_data + "\n").encode())
+      writer.write(WaitInfo.env_state_response)
       await writer.drain()
       logging.info("Environment state sent to the client")
+      # The client waits for the connection to be closed, to know the response
+      # is complete
+      break
     else:
-      logging.warning(f"Unknown message received: {message!r}")
+      logging.warning(f"Unknown message received: {message.decode(errors='replace')!r}")
   writer.close()
 
 
+@functools.lru_cache(maxsize=1)
 def construct_connection_command() -> tuple[str, str]:
   runner_name = os.getenv("CONNECTION_POD_NAME")
   cluster = os.getenv("CONNECTION_CLUSTER")
@@ -242,8 +262,7 @@ def construct_connection_command() -> tuple[str, str]:
 
   actions_path = os.path.dirname(__file__)
 
-  is_windows = platform.system() == "Windows"
-  if is_windows:
+  if _IS_WINDOWS:
     actions_path = actions_path.replace("\\", "\\\\")
 
   connect_command = (
@@ -292,11 +311,13 @@ async def wait_for_connection(host: str = "127.0.0.1", port: int = 12455):
 
   logging.info(f"Listening for connection notifications on {host}:{port}...")
   async with server:
+    # A single task is reused across iterations, rather than creating one per wakeup
+    stop_task = asyncio.ensure_future(WaitInfo.stop_event.wait())
     while not WaitInfo.stop_event.is_set():
       # Send a status msg every 60 seconds, unless a stop message is received
       # from the companion script
       await asyncio.wait(
-        [asyncio.create_task(WaitInfo.stop_event.wait())],
+        {stop_task},
         timeout=60,
         return_when=asyncio.FIRST_COMPLETED,
       )
@@ -317,6 +338,8 @@ async def wait_for_connection(host: str = "127.0.0.1", port: int = 12455):
 
       logging.info(f"Time since last keep-alive: {elapsed_seconds}s")
 
+    # Still pending if the wait ended due to a timeout, rather than a stop message
+    stop_task.cancel()
     logging.info("Waiting process terminated.")
 
 
@@ -332,10 +355,18 @@ def main(wait_regardless: bool = False, wait_after_conditions_check: bool = Fals
 
   finally:
     logging.debug("Deleting execution state data...")
+    # The state dir only ever holds these files, no need for a full tree walk
+    for file_name in (utils.STATE_ENV_FILENAME, utils.STATE_EXEC_INFO_FILENAME):
+      try:
+        os.unlink(os.path.join(utils.STATE_OUT_DIR, file_name))
+      except FileNotFoundError:
+        pass
     try:
-      shutil.rmtree(utils.STATE_OUT_DIR)
+      os.rmdir(utils.STATE_OUT_DIR)
     except FileNotFoundError:
       logging.debug("Did not find any execution state data to delete")
+    except OSError as e:
+      logging.debug(f"Could not delete the execution state directory: {e}")
 
 
 if __name__ == "__main__":
@@ -24,7 +24,8 @@ from seed_env.config import (
   DEFAULT_PYTHON_VERSION,
   DEFAULT_HARDWARE,
   DEFAULT_BUILD_PROJECT,
-  SUPPORTED_HARDWARE,
+  DEFAULT_RESOLVE_LOWEST,
+  SUPPORTED_HARDWARE_ORDER,
 )
 from seed_env.core import EnvironmentSeeder
 
@@ -119,8 +120,8 @@ def main():
     "--hardware",
     type=str,
     default=DEFAULT_HARDWARE,
-    choices=SUPPORTED_HARDWARE,
-    help=f"The target hardware for the environment. Supported: {', '.join(SUPPORTED_HARDWARE)}",
+    choices=SUPPORTED_HARDWARE_ORDER,
+    help=f"The target hardware for the environment. Supported: {', '.join(SUPPORTED_HARDWARE_ORDER)}",
   )
 
   # --- Optional Flags ---
@@ -130,6 +131,14 @@ def main():
     default=DEFAULT_BUILD_PROJECT,  # Default behavior is not to build
     help="If set, build a PyPI package based on the generated pyproject.toml for the host project.",
   )
+  parser.add_argument(
+    "--resolve-lowest",
+    action="store_true",
+    default=DEFAULT_RESOLVE_LOWEST,
+    help="If set, re-resolve the generated lower-bound dependencies with the lowest resolution "
+    "strategy, to verify them, and keep the resulting uv.lock. Otherwise, the pinned versions "
+    "they were derived from are kept, and no uv.lock is generated.",
+  )
   parser.add_argument(
     "--output-dir",
     type=str,
@@ -195,6 +204,7 @@ def main():
   logging.info(f"Python Version: {args.python_version}")
   logging.info(f"Hardware: {args.hardware}")
   logging.info(f"Build PyPI Package: {args.build_pypi_package}")
+  logging.info(f"Resolve Lowest: {args.resolve_lowest}")
   logging.info(f"Output Directory: {args.output_dir}")
   logging.info(f"Host Name: {host_name}")
 
@@ -221,6 +231,7 @@ def main():
       output_dir=args.output_dir,
       template_pyproject_toml=args.template_pyproject_toml,
       requirements_txt=args.requirements_txt,
+      resolve_lowest=args.resolve_lowest,
     )
     # Core function
     host_env_seeder.seed_environment()
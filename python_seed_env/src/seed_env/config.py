@@ -20,39 +20,57 @@ DEFAULT_SEED_CONFIG_FILE = "jax_seed.yaml"
 DEFAULT_PYTHON_VERSION = "3.12"
 DEFAULT_HARDWARE = "tpu"
 DEFAULT_BUILD_PROJECT = False
-SUPPORTED_HARDWARE = ["tpu", "gpu", "cuda12", "cuda13"]
+DEFAULT_RESOLVE_LOWEST = False
+# Ordered, for display (e.g. in --help); the frozenset is for membership checks
+SUPPORTED_HARDWARE_ORDER = ("tpu", "gpu", "cuda12", "cuda13")
+SUPPORTED_HARDWARE = frozenset(SUPPORTED_HARDWARE_ORDER)
 
-TENSORFLOW_DEPS = [
+# Cache for files downloaded at a specific commit, which can never change.
+# Overridden via the env var below; an empty value disables the cache.
+CACHE_DIR_ENV_VAR = "SEED_ENV_CACHE_DIR"
+DEFAULT_CACHE_DIR = "~/.cache/seed_env"
+
+# Dependency names (or regex patterns, if containing "*") excluded per hardware.
+# Frozensets, as these are only combined and checked for membership.
+TENSORFLOW_DEPS = frozenset({
   "tensorflow",
   "wrapt",
   "tensorboard",
   "protobuf",
   "setuptools",
-]
+})
 
-TPU_SPECIFIC_DEPS = [
+TPU_SPECIFIC_DEPS = frozenset({
   "libtpu",
-]
-
-CUDA12_SPECIFIC_DEPS = [
-  "jax-cuda12-plugin",
-  "jax-cuda12-pjrt",
-  "^nvidia-.*-cu12$",
-]
-
-CUDA13_SPECIFIC_DEPS = [
-  "jax-cuda13-plugin",
-  "jax-cuda13-pjrt",
-  "^nvidia-.*-cu13$",
-  "nvidia-cublas",
-  "nvidia-cuda-crt",
-  "nvidia-cuda-cupti",
-  "nvidia-cuda-nvcc",
-  "nvidia-cuda-nvrtc",
-  "nvidia-cuda-runtime",
-  "nvidia-cufft",
-  "nvidia-cusolver",
-  "nvidia-cusparse",
-  "nvidia-nvjitlink",
-  "nvidia-nvvm",
-]
+})
+
+
+def _cuda_specific_deps(cuda_major: int) -> frozenset:
+  """The JAX plugin and suffixed NVIDIA wheels for a CUDA major version."""
+  return frozenset({
+    f"jax-cuda{cuda_major}-plugin",
+    f"jax-cuda{cuda_major}-pjrt",
+    f"^nvidia-.*-cu{cuda_major}$",
+  })
+
+
+# NVIDIA wheels published without a CUDA suffix, as of CUDA 13
+_CUDA13_UNSUFFIXED_NVIDIA_TOKENS = (
+  "cublas",
+  "cuda-crt",
+  "cuda-cupti",
+  "cuda-nvcc",
+  "cuda-nvrtc",
+  "cuda-runtime",
+  "cufft",
+  "cusolver",
+  "cusparse",
+  "nvjitlink",
+  "nvvm",
+)
+
+CUDA12_SPECIFIC_DEPS = _cuda_specific_deps(12)
+
+CUDA13_SPECIFIC_DEPS = _cuda_specific_deps(13) | frozenset(
+  f"nvidia-{token}" for token in _CUDA13_UNSUFFIXED_NVIDIA_TOKENS
+)
@@ -16,6 +16,7 @@ limitations under the License.
 
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from importlib.resources import files
 from random import randint
 from string import hexdigits
@@ -65,6 +66,7 @@ class EnvironmentSeeder:
     output_dir: str,
     template_pyproject_toml: str = None,
     requirements_txt: None | str = None,
+    resolve_lowest: bool = False,
   ):
     self.host_name = host_name
     self.host_source_type = host_source_type
@@ -82,6 +84,7 @@ class EnvironmentSeeder:
     self.requirements_txt = (
       "requirements.txt" if requirements_txt == "" else requirements_txt
     )
+    self.resolve_lowest = resolve_lowest
 
     self._load_seed_config()
 
@@ -141,8 +144,9 @@ class EnvironmentSeeder:
       3. Downloads the seed project's lock file (e.g., build/requirements_lock_3_12.txt) for the specified
             Python version, e.g., 3.12, and commit.
       4. Generates a minimal pyproject.toml file for the specified Python environment.
-      5. Combines the seed lock file and the host requirements to generate a new pyproject.toml, uv.lock,
-            and host_requirements.txt in the output directory, using uv commands. Handles hardware-specific
+      5. Combines the seed lock file and the host requirements to generate a new pyproject.toml and
+            host lock file (plus a uv.lock, if resolving the lowest versions) in the output directory,
+            using uv commands. Handles hardware-specific
             dependency exclusions (e.g., excludes libtpu for GPU, or CUDA dependencies for TPU).
       6. Optionally builds a PyPI package for the host project if requested.
 
@@ -180,54 +184,78 @@ class EnvironmentSeeder:
 
     # Create a directory for storing the downloaded requirements file
     self.download_dir = "downloaded_base_and_seed_requirements"
-    os.makedirs(self.download_dir, exist_ok=True)
+    # Create the download directories once, up front, rather than on every download
+    host_download_dir = os.path.join(self.download_dir, "host")
+    seed_download_dir = os.path.join(self.download_dir, "seed")
+    os.makedirs(host_download_dir, exist_ok=True)
+    os.makedirs(seed_download_dir, exist_ok=True)
 
     # 1. Determine the host requirements file based on the source type
     HOST_REQUIREMENTS_FILE = None
-    if self.host_source_type == "remote":
-      # Download the host requirements file from the remote repository at the specified commit
-      logging.info(
-        f"Downloading host requirements file {self.host_requirements_file_path} from {self.host_github_org_repo} at commit/branch {self.host_commit}"
-      )
-      remote_host_url = f"https://raw.githubusercontent.com/{self.host_github_org_repo}/{self.host_commit}/{self.host_requirements_file_path}"
-      HOST_REQUIREMENTS_FILE = os.path.abspath(
-        download_remote_git_file(remote_host_url, self.download_dir + "/host")
-      )
-    elif self.host_source_type == "local":
+    if self.host_source_type == "local":
       if not os.path.isfile(self.host_requirements_file_path):
         raise FileNotFoundError(
           f"Local requirements file does not exist: {self.host_requirements_file_path}"
         )
       HOST_REQUIREMENTS_FILE = self.host_requirements_file_path
-    else:
+    elif self.host_source_type != "remote":
       raise ValueError(
         f"Unsupported host source type: {self.host_source_type}. Supported: 'remote', 'local'."
       )
 
-    # 2. Initialize the seeder instance with the seed config, passing the path where the seed requirements lock files will be downloaded
-    self.seeder = Seeder(
-      seed_tag_or_commit=self.seed_tag_or_commit,
-      config=self.loaded_seed_config,
-      download_dir=self.download_dir + "/seed",
-    )
-    logging.info(
-      f"Using {self.seeder.pypi_project_name} at tag/commit {self.seed_tag_or_commit} on {self.seeder.github_org_repo} as seed"
-    )
+    # The remote host and seed downloads (steps 1 and 3) are network bound and
+    # independent of each other, so they all run concurrently
+    with ThreadPoolExecutor(max_workers=4) as executor:
+      host_requirements_future = None
+      if self.host_source_type == "remote":
+        # Download the host requirements file from the remote repository at the specified commit
+        logging.info(
+          f"Downloading host requirements file {self.host_requirements_file_path} from {self.host_github_org_repo} at commit/branch {self.host_commit}"
+        )
+        remote_host_url = f"https://raw.githubusercontent.com/{self.host_github_org_repo}/{self.host_commit}/{self.host_requirements_file_path}"
+        host_requirements_future = executor.submit(
+          download_remote_git_file,
+          remote_host_url,
+          host_download_dir,
+          ensure_dir=False,
+        )
+
+      # 2. Initialize the seeder instance with the seed config, passing the path where the seed requirements lock files will be downloaded
+      self.seeder = Seeder(
+        seed_tag_or_commit=self.seed_tag_or_commit,
+        config=self.loaded_seed_config,
+        download_dir=seed_download_dir,
+      )
+      logging.info(
+        f"Using {self.seeder.pypi_project_name} at tag/commit {self.seed_tag_or_commit} on {self.seeder.github_org_repo} as seed"
+      )
+
+      # 3. Download the seed lock file for each of the specified Python versions
+      seed_lock_futures = {
+        python_version: executor.submit(
+          self.seeder.download_seed_lock_requirement, python_version
+        )
+        for python_version in self.python_versions
+      }
+
+      if host_requirements_future is not None:
+        HOST_REQUIREMENTS_FILE = os.path.abspath(host_requirements_future.result())
+      seed_lock_files = {
+        python_version: os.path.abspath(future.result())
+        for python_version, future in seed_lock_futures.items()
+      }
 
     versioned_project_toml_files = []
     for python_version in self.python_versions:
       # Generate a subdir for each python version
-      versioned_output_dir = (
-        self.output_dir + "/python" + python_version.replace(".", "_")
+      versioned_output_dir = os.path.join(
+        self.output_dir, "python" + python_version.replace(".", "_")
       )
       os.makedirs(versioned_output_dir, exist_ok=True)
       versioned_pyproject_path = os.path.join(versioned_output_dir, "pyproject.toml")
       versioned_project_toml_files.append(versioned_pyproject_path)
 
-      # 3. Download the seed lock file for the specified Python version
-      SEED_LOCK_FILE = os.path.abspath(
-        self.seeder.download_seed_lock_requirement(python_version)
-      )
+      SEED_LOCK_FILE = seed_lock_files[python_version]
 
       # 4. Generate a pyproject.toml file for the specified Python version.
       logging.info(f"Generating minimal pyproject.toml for Python {python_version}")
@@ -237,13 +265,15 @@ class EnvironmentSeeder:
 
       # Construct the host lock file name
       HOST_LOCK_FILE_NAME = f"{self.host_name.replace('-', '_')}_requirements_lock_{python_version.replace('.', '_')}.txt"
-      # 5. Generate the pyproject.toml, uv.lock, and host_requirements.txt in the output directory
+      # 5. Generate the pyproject.toml and the host lock file (plus a uv.lock, if
+      # resolving the lowest versions) in the output directory
       build_seed_env(
         HOST_REQUIREMENTS_FILE,
         SEED_LOCK_FILE,
         versioned_output_dir,
         self.hardware,
         HOST_LOCK_FILE_NAME,
+        resolve_lowest=self.resolve_lowest,
       )
 
     # Combine the individual pyproject.toml files from each python_version subdirectory
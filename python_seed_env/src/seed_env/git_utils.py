@@ -15,20 +15,81 @@ limitations under the License.
 """
 
 import os
+import functools
+import hashlib
 import logging
 import re
+import shutil
+import tempfile
+import threading
 import requests
 
+from seed_env.config import CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR
+from seed_env.utils import HTTP_SESSION, REQUEST_TIMEOUT
+
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# A full, 40-character hexadecimal commit hash
+_COMMIT_HASH_REGEX = re.compile(r"[0-9a-f]{40}")
+
+# Size of the chunks in which downloaded files are written to disk, in bytes
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+def _get_github_api_headers() -> dict[str, str]:
+  """
+  Returns the headers for GitHub API requests, authenticated if a token is
+  available, for the much higher rate limit of authenticated requests.
+  """
+  headers = {}
+  gh_token = os.getenv("GITHUB_TOKEN")
+  if gh_token:
+    headers["Authorization"] = f"Bearer {gh_token}"
+  return headers
+
+
+def _get_download_cache_path(url: str) -> str | None:
+  """
+  Returns the path under which the file at `url` is cached, or None if it should not be.
+
+  Only URLs pinned to a commit hash are cached, as their content never changes.
+  """
+  cache_dir = os.environ.get(CACHE_DIR_ENV_VAR, DEFAULT_CACHE_DIR)
+  if not cache_dir:
+    return None
+  if not any(looks_like_commit_hash(segment) for segment in url.split("/")):
+    return None
+  url_hash = hashlib.sha256(url.encode("utf-8")).hexdigest()
+  return os.path.join(os.path.expanduser(cache_dir), url_hash)
+
 
-def download_remote_git_file(url: str, output_dir: str) -> str:
+def _save_to_download_cache(file_path: str, cache_path: str):
+  """Copies a downloaded file into the cache, atomically, so readers never see partial files."""
+  try:
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    os.close(fd)
+    try:
+      shutil.copyfile(file_path, tmp_path)
+      os.replace(tmp_path, cache_path)
+    except OSError:
+      os.remove(tmp_path)
+      raise
+  except OSError as e:
+    logging.warning(f"Failed to cache {file_path} at {cache_path}: {e}")
+
+
+def download_remote_git_file(url: str, output_dir: str, ensure_dir: bool = True) -> str:
   """
   Downloads a file from a given GitHub raw URL and saves it to the specified output directory.
+  Files pinned to a commit hash are cached locally, and reused on later downloads.
 
   Args:
       url (str): The raw GitHub URL of the file to download.
       output_dir (str): The directory where the file should be saved.
+      ensure_dir (bool): If True, create the output directory if it does not exist.
+          Callers that already created it can pass False, to skip the check.
 
   Returns:
       str: The path to the downloaded file.
@@ -37,22 +98,60 @@ def download_remote_git_file(url: str, output_dir: str) -> str:
       requests.RequestException: If the download fails.
       OSError: If the file cannot be written.
   """
-  os.makedirs(output_dir, exist_ok=True)  # Ensure the output directory exists
+  if ensure_dir:
+    os.makedirs(output_dir, exist_ok=True)  # Ensure the output directory exists
   filename = os.path.basename(url)
   output_path = os.path.join(output_dir, filename)
+
+  cache_path = _get_download_cache_path(url)
+  if cache_path and os.path.isfile(cache_path):
+    shutil.copyfile(cache_path, output_path)
+    logging.info(f"Using cached copy of {url}: {output_path}")
+    return output_path
+
   try:
     logging.info(f"Downloading file from {url} to {output_path}")
-    response = requests.get(url)
-    response.raise_for_status()
-    with open(output_path, "wb") as f:
-      f.write(response.content)
+    # Stream the response to disk, rather than buffering the whole file in memory
+    with HTTP_SESSION.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+      response.raise_for_status()
+      with open(output_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE):
+          f.write(chunk)
     logging.info(f"File downloaded successfully: {output_path}")
+    if cache_path:
+      _save_to_download_cache(output_path, cache_path)
     return output_path
   except Exception as e:
     logging.error(f"Failed to download file from {url}: {e}")
     raise
 
 
+def warm_up_remote_git_file(url: str) -> threading.Thread:
+  """
+  Sends a HEAD request for a file in the background, ignoring any errors.
+
+  This resolves the host and opens a pooled connection to it, while the caller is
+  still busy with other requests, so that the actual download of `url` starts sooner.
+
+  Args:
+      url (str): The raw GitHub URL of a file that is likely to be downloaded next.
+
+  Returns:
+      threading.Thread: The (daemon) thread sending the request.
+  """
+
+  def _send_head_request():
+    try:
+      HTTP_SESSION.head(url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+      logging.debug(f"Failed to warm up the connection for {url}: {e}")
+
+  thread = threading.Thread(target=_send_head_request, daemon=True)
+  thread.start()
+  return thread
+
+
+@functools.lru_cache(maxsize=128)
 def resolve_github_tag_to_commit(github_org_repo: str, tag: str) -> str:
   """
   Resolves a GitHub tag to its corresponding commit hash.
@@ -70,7 +169,9 @@ def resolve_github_tag_to_commit(github_org_repo: str, tag: str) -> str:
   """
   url = f"https://api.github.com/repos/{github_org_repo}/git/ref/tags/{tag}"
   try:
-    response = requests.get(url)
+    response = HTTP_SESSION.get(
+      url, headers=_get_github_api_headers(), timeout=REQUEST_TIMEOUT
+    )
     response.raise_for_status()
     data = response.json()
     if "object" not in data or "sha" not in data["object"]:
@@ -81,6 +182,7 @@ def resolve_github_tag_to_commit(github_org_repo: str, tag: str) -> str:
     raise
 
 
+@functools.lru_cache(maxsize=128)
 def is_valid_commit_hash(github_org_repo: str, commit_hash: str) -> bool:
   """
   Checks if a given commit hash is valid in a GitHub repository.
@@ -93,12 +195,27 @@ def is_valid_commit_hash(github_org_repo: str, commit_hash: str) -> bool:
       bool: True if the commit hash is valid, False otherwise.
 
   Raises:
-      requests.RequestException: If the request to GitHub fails.
+      requests.RequestException: If the request to GitHub fails, including with an
+          error status other than 404/422 (e.g. after the retries of a 5xx), so that
+          a transient failure is neither cached nor reported as an invalid hash.
   """
   url = f"https://api.github.com/repos/{github_org_repo}/commits/{commit_hash}"
   try:
-    response = requests.get(url)
-    return response.status_code == 200
+    # Only the status is needed, so skip downloading the commit details
+    response = HTTP_SESSION.head(
+      url,
+      headers=_get_github_api_headers(),
+      allow_redirects=True,
+      timeout=REQUEST_TIMEOUT,
+    )
+    if response.status_code == 200:
+      return True
+    # GitHub answers 404 for an unknown commit, and 422 for a malformed one
+    if response.status_code in (404, 422):
+      return False
+    raise requests.HTTPError(
+      f"Unexpected status {response.status_code} for {url}", response=response
+    )
   except requests.RequestException as e:
     logging.error(
       f"Failed to check commit hash '{commit_hash}' in repo '{github_org_repo}': {e}"
@@ -117,4 +234,4 @@ def looks_like_commit_hash(commit_hash: str) -> bool:
   Returns:
       bool: True if the string looks like a commit hash, False otherwise.
   """
-  return re.fullmatch(r"[0-9a-f]{40}", commit_hash) is not None
+  return _COMMIT_HASH_REGEX.fullmatch(commit_hash) is not None
@@ -16,6 +16,7 @@ limitations under the License.
 
 import logging
 import os
+import threading
 from pathlib import Path
 from typing import Optional, Dict, Any
 
@@ -28,6 +29,7 @@ from seed_env.git_utils import (
   resolve_github_tag_to_commit,
   is_valid_commit_hash,
   looks_like_commit_hash,
+  warm_up_remote_git_file,
 )
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
@@ -44,6 +46,7 @@ class Seeder:
     self, seed_tag_or_commit: str, config: Dict[str, Any], download_dir: Optional[Path]
   ):
     self.seed_tag_or_commit = seed_tag_or_commit
+    self._seed_commit_lock = threading.Lock()
     if download_dir is None:
       download_dir = Path.cwd() / "seed_locks"
     self.download_dir = download_dir  # Path to the download directory where seed lock files will be stored.
@@ -92,35 +95,45 @@ class Seeder:
         "Please provide a valid tag/commit or use 'latest' to determine the latest release version."
       )
 
-    if self.seed_tag_or_commit.lower() == "latest":
-      logging.info(
-        f"Using 'latest' to determine the most recent stable {self.pypi_project_name} version."
-      )
-      latest_version = get_latest_project_version_from_pypi(self.pypi_project_name)
-      target_tag_or_commit_for_resolve = self.release_tag_pattern.format(
-        latest_version=latest_version
+    # A tag or commit can be used in the file URL as is, so the connection for the
+    # download can be warmed up while the tag or commit is resolved/validated below
+    if self.seed_tag_or_commit.lower() != "latest":
+      warm_up_remote_git_file(
+        f"https://raw.githubusercontent.com/{self.github_org_repo}/{self.seed_tag_or_commit}/{file_name}"
       )
 
-      logging.info(
-        f"Latest {self.pypi_project_name} version determined: {latest_version}. "
-        f"Attempting to resolve tag/version: {target_tag_or_commit_for_resolve}"
-      )
-      seed_commit = resolve_github_tag_to_commit(
-        self.github_org_repo, target_tag_or_commit_for_resolve
-      )
-    elif looks_like_commit_hash(self.seed_tag_or_commit):
-      if not is_valid_commit_hash(self.github_org_repo, self.seed_tag_or_commit):
-        raise ValueError(
-          f"Provided commit hash '{self.seed_tag_or_commit}' is not valid for {self.github_org_repo}."
+    # The lookups are cached, and serialized so that concurrent downloads for
+    # several Python versions share a single round of GitHub/PyPI requests
+    with self._seed_commit_lock:
+      if self.seed_tag_or_commit.lower() == "latest":
+        logging.info(
+          f"Using 'latest' to determine the most recent stable {self.pypi_project_name} version."
+        )
+        latest_version = get_latest_project_version_from_pypi(self.pypi_project_name)
+        target_tag_or_commit_for_resolve = self.release_tag_pattern.format(
+          latest_version=latest_version
+        )
+
+        logging.info(
+          f"Latest {self.pypi_project_name} version determined: {latest_version}. "
+          f"Attempting to resolve tag/version: {target_tag_or_commit_for_resolve}"
+        )
+        seed_commit = resolve_github_tag_to_commit(
+          self.github_org_repo, target_tag_or_commit_for_resolve
+        )
+      elif looks_like_commit_hash(self.seed_tag_or_commit):
+        if not is_valid_commit_hash(self.github_org_repo, self.seed_tag_or_commit):
+          raise ValueError(
+            f"Provided commit hash '{self.seed_tag_or_commit}' is not valid for {self.github_org_repo}."
+          )
+        seed_commit = self.seed_tag_or_commit
+      else:
+        logging.info(
+          f"Assuming the provided seed commit '{self.seed_tag_or_commit}' is a {self.pypi_project_name} tag."
+        )
+        seed_commit = resolve_github_tag_to_commit(
+          self.github_org_repo, self.seed_tag_or_commit
         )
-      seed_commit = self.seed_tag_or_commit
-    else:
-      logging.info(
-        f"Assuming the provided seed commit '{self.seed_tag_or_commit}' is a {self.pypi_project_name} tag."
-      )
-      seed_commit = resolve_github_tag_to_commit(
-        self.github_org_repo, self.seed_tag_or_commit
-      )
 
     if not seed_commit:
       raise ValueError(
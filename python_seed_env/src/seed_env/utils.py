@@ -15,14 +15,56 @@ limitations under the License.
 """
 
 import os
+import functools
+import signal
 import subprocess
 import logging
+import threading
 import re
 import requests
+from packaging.version import InvalidVersion, Version
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# A Python version in the X.Y format
+_PYTHON_VERSION_REGEX = re.compile(r"\d+\.\d+")
 
+# (connect, read) timeouts, in seconds, for all HTTP requests
+REQUEST_TIMEOUT = (5, 30)
+
+
+def _create_http_session() -> requests.Session:
+  """
+  Creates a session shared by all GitHub/PyPI requests, so that connections to
+  the same host are kept alive and reused, and transient errors are retried.
+  Non-retryable error statuses are returned as is, for callers to handle.
+  """
+  session = requests.Session()
+  adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=8,
+    max_retries=Retry(
+      total=3,
+      backoff_factor=0.3,
+      status_forcelist=[429, 500, 502, 503, 504],
+      raise_on_status=False,
+    ),
+  )
+  for prefix in (
+    "https://api.github.com",
+    "https://raw.githubusercontent.com",
+    "https://pypi.org",
+  ):
+    session.mount(prefix, adapter)
+  return session
+
+
+HTTP_SESSION = _create_http_session()
+
+
+@functools.lru_cache(maxsize=128)
 def get_latest_project_version_from_pypi(project_name: str) -> str:
   """
   Retrieves the latest version of a given project from PyPI.
@@ -37,16 +79,25 @@ def get_latest_project_version_from_pypi(project_name: str) -> str:
       requests.RequestException: If the request to PyPI fails.
       ValueError: If the project is not found or has no releases.
   """
-  url = f"https://pypi.org/pypi/{project_name}/json"
+  # The simple index only lists the versions, unlike the full JSON API, which
+  # also carries the metadata of every release file
+  url = f"https://pypi.org/simple/{project_name}/"
+  headers = {"Accept": "application/vnd.pypi.simple.v1+json"}
   try:
-    response = requests.get(url)
+    response = HTTP_SESSION.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
     response.raise_for_status()
     data = response.json()
-    if "releases" not in data or not data["releases"]:
+    versions = []
+    for version_str in data.get("versions", []):
+      try:
+        versions.append((Version(version_str), version_str))
+      except InvalidVersion:
+        logging.debug(f"Skipping invalid version '{version_str}' of '{project_name}'")
+    if not versions:
       raise ValueError(f"No releases found for project '{project_name}'")
-    latest_version = max(
-      data["releases"].keys(), key=lambda v: tuple(map(int, v.split(".")))
-    )
+    # Prefer the latest final release, if there is one
+    final_versions = [v for v in versions if not v[0].is_prerelease]
+    _, latest_version = max(final_versions or versions)
     return latest_version
   except requests.RequestException as e:
     logging.error(f"Failed to fetch latest version for project '{project_name}': {e}")
@@ -115,6 +166,14 @@ allow-direct-references = true
 """
   try:
     pyproject_path = os.path.join(output_dir, "pyproject.toml")
+    # Leave an identical file untouched, so that its mtime (and uv's cache) is kept
+    try:
+      with open(pyproject_path, "r") as f:
+        if f.read() == content:
+          logging.info(f"Minimal pyproject.toml is up to date at {pyproject_path}")
+          return pyproject_path
+    except FileNotFoundError:
+      pass
     with open(pyproject_path, "w") as f:
       f.write(content)
     logging.info(f"Generated minimal pyproject.toml at {pyproject_path}")
@@ -124,45 +183,88 @@ allow-direct-references = true
     raise
 
 
-def run_command(command, cwd=None, capture_output=False, check=True):
+def run_command(command, cwd=None, capture_output=False, check=True, timeout=None):
   """
-  Executes a shell command.
+  Executes a shell command, logging its output line by line as it is produced.
   Args:
       command (list or str): The command to execute.
       cwd (str, optional): The current working directory for the command.
-      capture_output (bool): If True, stdout and stderr will be captured and returned.
+      capture_output (bool): If True, the output (stdout and stderr, combined) is also
+          returned, and only logged at the DEBUG level.
       check (bool): If True, raise CalledProcessError if the command returns a non-zero exit code.
+      timeout (float, optional): Seconds after which the command is killed, if still running.
   Returns:
       subprocess.CompletedProcess: The result of the command execution.
   Raises:
       subprocess.CalledProcessError: If check is True and the command fails.
+      subprocess.TimeoutExpired: If the command did not finish within the timeout.
   """
   cmd_str = " ".join(command) if isinstance(command, list) else command
   logging.info(f"Executing command: {cmd_str}")
+  output_log_level = logging.DEBUG if capture_output else logging.INFO
+  output_lines = []
+  timed_out = threading.Event()
   try:
-    result = subprocess.run(
+    with subprocess.Popen(
       command,
       cwd=cwd,
-      capture_output=capture_output,
-      text=True,  # Decode stdout/stderr as text
-      check=check,
-    )
-    if capture_output:
-      # Only print debug output if logging level is DEBUG
-      if logging.getLogger().level <= logging.DEBUG:
-        logging.debug(f"Stdout:\n{result.stdout}")
-        if result.stderr:
-          logging.debug(f"Stderr:\n{result.stderr}")
-    return result
+      stdout=subprocess.PIPE,
+      stderr=subprocess.STDOUT,
+      encoding="utf-8",
+      errors="replace",  # Tools may print bytes that aren't valid UTF-8
+      bufsize=1,  # Line buffered, to log lines as soon as they arrive
+      # In its own process group, so that a timeout also kills its children,
+      # which would otherwise keep the output pipe open
+      start_new_session=True,
+    ) as process:
+
+      def _kill_process_group():
+        try:
+          os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+          pass  # Already exited
+
+      def _kill_on_timeout():
+        timed_out.set()
+        _kill_process_group()
+
+      timer = None
+      if timeout is not None:
+        timer = threading.Timer(timeout, _kill_on_timeout)
+        timer.start()
+      try:
+        for line in process.stdout:
+          logging.log(output_log_level, line.rstrip("\n"))
+          if capture_output:
+            output_lines.append(line)
+        returncode = process.wait()
+      except BaseException:
+        # Being in its own session, the command doesn't get e.g. a Ctrl+C itself
+        _kill_process_group()
+        raise
+      finally:
+        if timer is not None:
+          timer.cancel()
+
+    stdout = "".join(output_lines) if capture_output else None
+    # The timer may fire just after a normal exit, only a kill means a timeout
+    if timed_out.is_set() and returncode == -signal.SIGKILL:
+      raise subprocess.TimeoutExpired(command, timeout, output=stdout)
+    if check and returncode != 0:
+      raise subprocess.CalledProcessError(returncode, command, output=stdout)
+    return subprocess.CompletedProcess(command, returncode, stdout=stdout)
   except FileNotFoundError:
     logging.error(
       f"Command not found: '{command[0]}'. Make sure it's installed and in your PATH."
     )
     raise
+  except subprocess.TimeoutExpired as e:
+    logging.error(f"Command timed out after {e.timeout} seconds: {e.cmd}")
+    raise
   except subprocess.CalledProcessError as e:
     logging.error(f"Command failed with exit code {e.returncode}: {e.cmd}")
-    logging.error(f"Stdout:\n{e.stdout}")
-    logging.error(f"Stderr:\n{e.stderr}")
+    if e.stdout:
+      logging.error(f"Output:\n{e.stdout}")
     raise
   except Exception as e:
     logging.error(f"An unexpected error occurred while running command: {e}")
@@ -176,4 +278,4 @@ def valid_python_version_format(python_version: str) -> bool:
   """
   if not isinstance(python_version, str):
     return False
-  return re.fullmatch(r"\d+\.\d+", python_version) is not None
+  return _PYTHON_VERSION_REGEX.fullmatch(python_version) is not None
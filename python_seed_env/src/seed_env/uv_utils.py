@@ -18,12 +18,15 @@ import re
 import os
 import toml
 import logging
-import shutil
+import functools
 
 from collections import defaultdict
+from packaging.utils import canonicalize_name
 from packaging.version import Version
 
 from seed_env.config import (
+  SUPPORTED_HARDWARE,
+  SUPPORTED_HARDWARE_ORDER,
   TPU_SPECIFIC_DEPS,
   CUDA12_SPECIFIC_DEPS,
   CUDA13_SPECIFIC_DEPS,
@@ -33,6 +36,32 @@ from seed_env.utils import run_command
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 
+# Patterns for editing pyproject.toml files, compiled once rather than per call
+_DEPENDENCIES_REGEX = re.compile(
+  r"^dependencies\s*=\s*\[(\n+\s*.*,\s*)*[\n\r]*\]", re.MULTILINE
+)
+_PROJECT_HEADER_REGEX = re.compile(r"^\[project\]", re.MULTILINE)
+_REQUIRES_PYTHON_REGEX = re.compile(r'requires-python\s*=\s*".*?"')
+_PYTHON_VERSION_REGEX = re.compile(r"(\d+\.\d+)")
+# The project name at the start of a requirement line
+_REQUIREMENT_NAME_REGEX = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+# Dependencies to exclude per target hardware, i.e. the ones specific to other hardware,
+# combined once at import time
+_HARDWARE_SPECIFIC_DEPS = {
+  "tpu": CUDA12_SPECIFIC_DEPS | CUDA13_SPECIFIC_DEPS | TENSORFLOW_DEPS,
+  # For GPU, we assume cuda12 is the default and exclude TPU and cuda13 specific dependencies.
+  "gpu": TPU_SPECIFIC_DEPS | CUDA13_SPECIFIC_DEPS | TENSORFLOW_DEPS,
+  "cuda12": TPU_SPECIFIC_DEPS | CUDA13_SPECIFIC_DEPS | TENSORFLOW_DEPS,
+  "cuda13": TPU_SPECIFIC_DEPS | CUDA12_SPECIFIC_DEPS | TENSORFLOW_DEPS,
+}
+
+# The seed lock file, minus the dependencies specific to other hardware
+_FILTERED_SEED_LOCK_FILENAME = "seed_lock_filtered.txt"
+
+# Buffer size for reading lock files, which are read once, front to back
+_LOCK_FILE_BUFFER_SIZE = 64 * 1024
+
 
 def build_seed_env(
   host_requirements_file: str,
@@ -40,6 +69,7 @@ def build_seed_env(
   output_dir: str,
   hardware: str,
   host_lock_file_name: str,
+  resolve_lowest: bool = False,
 ):
   """
   Builds the seed environment by combining the host requirements and seed lock files.
@@ -50,6 +80,10 @@ def build_seed_env(
       output_dir (str): Directory where the output files will be saved.
       hardware (str): The target hardware for the environment (e.g., 'tpu', 'gpu').
       host_lock_file_name (str): The name of the host lock file to be generated.
+      resolve_lowest (bool): If True, re-resolve the lower-bound project with the lowest
+          resolution strategy and export that as the host lock file. Otherwise, the pins
+          of the highest resolution, which are exactly the lower bounds, are kept, and
+          no uv.lock is left in the output directory.
   """
   if not os.path.isfile(host_requirements_file):
     raise FileNotFoundError(
@@ -77,7 +111,11 @@ def build_seed_env(
       )
       raise
 
-  # TODO(kanglant): Remove this index url later; modify seed lock file before running uv add command
+  # Leave out the hardware specific deps up front, rather than removing them after adding
+  filtered_seed_lock_file = _filter_hardware_specific_deps(
+    hardware, seed_lock_file, output_dir
+  )
+
   command = [
     "uv",
     "add",
@@ -88,11 +126,13 @@ def build_seed_env(
     "--directory",
     output_dir,
     "-r",
-    seed_lock_file,
+    filtered_seed_lock_file,
   ]
-  run_command(command)
-
-  _remove_hardware_specific_deps(hardware, pyproject_file, output_dir)
+  try:
+    run_command(command)
+  finally:
+    if filtered_seed_lock_file != seed_lock_file:
+      os.remove(filtered_seed_lock_file)
 
   command = [
     "uv",
@@ -126,7 +166,13 @@ def build_seed_env(
     os.path.join(output_dir, host_lock_file_name), pyproject_file
   )
 
+  # The lock was resolved from the seed pins, which pyproject.toml no longer has
   os.remove(uv_lock_file)
+
+  if not resolve_lowest:
+    logging.info("Environment build process completed successfully.")
+    return
+
   command = [
     "uv",
     "lock",
@@ -185,6 +231,41 @@ def build_pypi_package(output_dir: str):
   run_command(command)
 
 
+def _open_lock_file(filepath):
+  """Opens a lock file for a single sequential read, with a larger buffer and a kernel hint."""
+  file = open(filepath, "r", encoding="utf-8", buffering=_LOCK_FILE_BUFFER_SIZE)
+  if hasattr(os, "posix_fadvise"):
+    try:
+      os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+    except OSError:
+      pass  # Only a hint, reading works regardless
+  return file
+
+
+def _iter_lock_file_entries(file):
+  """
+  Yields the logical entries of a requirements file, each as the list of its physical
+  lines, i.e. a line ending with a backslash is grouped with the lines continuing it
+  (e.g. the `--hash=...` lines of a hash-pinned requirement).
+  """
+  entry = []
+  for line in file:
+    entry.append(line)
+    if not line.rstrip("\r\n").endswith("\\"):
+      yield entry
+      entry = []
+  if entry:
+    yield entry
+
+
+def _iter_pinned_deps_from_a_req_lock_file(filepath):
+  """Lazily yields the pinned dependencies of a requirements lock file, see below."""
+  with _open_lock_file(filepath) as file:
+    for line in file:
+      if "#" not in line and ("==" in line or "@" in line):
+        yield line.strip()
+
+
 def _read_pinned_deps_from_a_req_lock_file(filepath):
   """
   Reads a requirements lock file and extracts all pinned dependencies.
@@ -199,12 +280,7 @@ def _read_pinned_deps_from_a_req_lock_file(filepath):
   This function skips comment lines and only includes lines that specify pinned dependencies
   (using '==' or '@' for VCS links).
   """
-  lines = []
-  with open(filepath, "r", encoding="utf-8") as file:
-    for line in file:
-      if "#" not in line and ("==" in line or "@" in line):
-        lines.append(line.strip())
-  return lines
+  return list(_iter_pinned_deps_from_a_req_lock_file(filepath))
 
 
 def _convert_pinned_deps_to_lower_bound(pinned_deps):
@@ -212,24 +288,50 @@ def _convert_pinned_deps_to_lower_bound(pinned_deps):
   Converts a list of pinned dependencies (e.g., 'package==version') to lower-bound dependencies (e.g., 'package>=version').
 
   Args:
-      pinned_deps (list[str]): A list of dependency strings pinned to specific versions.
+      pinned_deps (Iterable[str]): Dependency strings pinned to specific versions.
 
   Returns:
       list[str]: A list of dependency strings with lower-bound version specifiers.
 
   This function replaces '==' with '>=' for each dependency, preserving other dependency formats (such as VCS links).
   """
-  lower_bound_deps = []
-  for pinned_dep in pinned_deps:
-    lower_bound_dep = pinned_dep
-    if "==" in pinned_dep:
-      split_pinned_dep = pinned_dep.split(";")
-      lower_bound_dep = split_pinned_dep[0].replace("==", ">=")
-      if len(split_pinned_dep) > 1:
-        lower_bound_dep = ";".join([lower_bound_dep] + split_pinned_dep[1:])
-    lower_bound_deps.append(lower_bound_dep)
+  # Only the requirement itself is converted, never the environment markers, which
+  # may compare with '==' too. A pinned requirement has a single '==', and replacing
+  # it is a no-op for other formats, so no separate membership check is needed.
+  return [
+    requirement.replace("==", ">=", 1) + sep + markers
+    for requirement, sep, markers in (dep.partition(";") for dep in pinned_deps)
+  ]
+
+
+def _replace_dependencies_in_toml_content(new_deps_list: list, content: str) -> str:
+  """Returns the pyproject.toml `content` with its dependencies array replaced."""
+  if new_deps_list:
+    new_deps = 'dependencies = [\n    "' + '",\n    "'.join(new_deps_list) + '",\n]'
+  else:
+    new_deps = "dependencies = []"
+
+  if _DEPENDENCIES_REGEX.search(content):
+    return _DEPENDENCIES_REGEX.sub(new_deps, content)
+  elif _PROJECT_HEADER_REGEX.search(content):
+    # If it doesn't exist but [project] does, add it after the [project] header.
+    return _PROJECT_HEADER_REGEX.sub(f"[project]\n{new_deps}", content, count=1)
+  else:
+    logging.error("No project table found in the template pyproject.toml.")
+    raise
+
+
+def _replace_python_requirement_in_toml_content(min_python: str, content: str) -> str:
+  """Returns the pyproject.toml `content` with requires-python set to a lower bound."""
+  new_requires_line = f'requires-python = ">={min_python}"'
+  return _REQUIRES_PYTHON_REGEX.sub(new_requires_line, content)
 
-  return lower_bound_deps
+
+def _write_if_changed(filepath: str, content: str, new_content: str):
+  """Writes `new_content` to `filepath` only if it differs, to keep the file's mtime otherwise."""
+  if new_content != content:
+    with open(filepath, "w", encoding="utf-8") as f:
+      f.write(new_content)
 
 
 def replace_dependencies_in_project_toml(new_deps_list: list, filepath: str):
@@ -243,30 +345,11 @@ def replace_dependencies_in_project_toml(new_deps_list: list, filepath: str):
   This function reads the specified pyproject.toml file, finds the existing project dependencies array,
   and replaces it with the provided new_deps_list list. The updated content is then written back to the file.
   """
-  if new_deps_list:
-    new_deps = 'dependencies = [\n    "' + '",\n    "'.join(new_deps_list) + '",\n]'
-  else:
-    new_deps = "dependencies = []"
-
-  dependencies_regex = re.compile(
-    r"^dependencies\s*=\s*\[(\n+\s*.*,\s*)*[\n\r]*\]", re.MULTILINE
-  )
-  project_header_regex = re.compile(r"^\[project\]", re.MULTILINE)
-
   with open(filepath, "r", encoding="utf-8") as f:
     content = f.read()
 
-  if dependencies_regex.search(content):
-    new_content = dependencies_regex.sub(new_deps, content)
-  elif project_header_regex.search(content):
-    # If it doesn't exist but [project] does, add it after the [project] header.
-    new_content = project_header_regex.sub(f"[project]\n{new_deps}", content, count=1)
-  else:
-    logging.error("No project table found in the template pyproject.toml.")
-    raise
-
-  with open(filepath, "w", encoding="utf-8") as f:
-    f.write(new_content)
+  new_content = _replace_dependencies_in_toml_content(new_deps_list, content)
+  _write_if_changed(filepath, content, new_content)
 
 
 def replace_python_requirement_in_project_toml(min_python: str, filepath: str):
@@ -280,15 +363,11 @@ def replace_python_requirement_in_project_toml(min_python: str, filepath: str):
   This function reads the specified pyproject.toml file, finds the existing project requires-python string,
   and replaces it with the min_python as the lower bound. The updated content is then written back to the file.
   """
-  min_python_regex = re.compile(r'requires-python\s*=\s*".*?"')
-  new_requires_line = f'requires-python = ">={min_python}"'
-
   with open(filepath, "r", encoding="utf-8") as f:
     content = f.read()
-  new_content = min_python_regex.sub(new_requires_line, content)
 
-  with open(filepath, "w", encoding="utf-8") as f:
-    f.write(new_content)
+  new_content = _replace_python_requirement_in_toml_content(min_python, content)
+  _write_if_changed(filepath, content, new_content)
 
 
 def set_exact_python_requirement_in_project_toml(python_version: str, filepath: str):
@@ -299,19 +378,17 @@ def set_exact_python_requirement_in_project_toml(python_version: str, filepath:
       python_version (str): The target Python version (e.g., '3.12').
       filepath (str): Path to the pyproject.toml file to update.
   """
-  python_req_regex = re.compile(r'requires-python\s*=\s*".*?"')
-  project_header_regex = re.compile(r"^\[project\]", re.MULTILINE)
   new_requires_line = f'requires-python = "=={python_version}.*"'
 
   with open(filepath, "r", encoding="utf-8") as f:
     content = f.read()
 
-  if python_req_regex.search(content):
+  if _REQUIRES_PYTHON_REGEX.search(content):
     # If 'requires-python' exists, substitute it.
-    new_content = python_req_regex.sub(new_requires_line, content)
-  elif project_header_regex.search(content):
+    new_content = _REQUIRES_PYTHON_REGEX.sub(new_requires_line, content)
+  elif _PROJECT_HEADER_REGEX.search(content):
     # If it doesn't exist but [project] does, add it after the [project] header.
-    new_content = project_header_regex.sub(
+    new_content = _PROJECT_HEADER_REGEX.sub(
       f"[project]\n{new_requires_line}", content, count=1
     )
   else:
@@ -333,87 +410,87 @@ def lock_to_lower_bound_project(host_lock_file: str, pyproject_toml: str):
   This function reads all pinned dependencies from the lock file, converts them to lower-bound specifiers (e.g., 'package>=version'),
   formats them as a TOML dependencies array, and replaces the dependencies section in the given pyproject.toml file.
   """
-  pinned_deps = _read_pinned_deps_from_a_req_lock_file(host_lock_file)
+  # Stream the pinned deps straight into the conversion, without an intermediate list
+  pinned_deps = _iter_pinned_deps_from_a_req_lock_file(host_lock_file)
   lower_bound_deps = _convert_pinned_deps_to_lower_bound(pinned_deps)
   replace_dependencies_in_project_toml(lower_bound_deps, pyproject_toml)
 
 
-def _get_required_dependencies_from_pyproject_toml(file_path="pyproject.toml"):
-  """Reads pyproject.toml and extracts dependency names."""
-  deps = []
-  if not os.path.exists(file_path):
-    return deps
-  try:
-    with open(file_path, "r") as f:
-      data = toml.load(f)
-    if "project" in data and "dependencies" in data["project"]:
-      for dep in data["project"]["dependencies"]:
-        # Extract the package name before any version specifiers
-        package_name = (
-          dep
-          .split("==")[0]
-          .split(">=")[0]
-          .split("<=")[0]
-          .split("~=")[0]
-          .split("<")[0]
-          .split(">")[0]
-          .split("!=")[0]
-          .split("[")[0]  # Get the package name without extra
-          .strip()
-        )
-        deps.append(package_name)
-    return deps
-  except Exception as e:
-    print(f"Error reading {file_path}: {e}")
-    return deps
-
-
-def _remove_hardware_specific_deps(hardware: str, pyproject_file: str, output_dir: str):
-  if hardware == "tpu":
-    hardware_specific_deps_list = CUDA12_SPECIFIC_DEPS.copy()
-    hardware_specific_deps_list.extend(CUDA13_SPECIFIC_DEPS)
-    hardware_specific_deps_list.extend(TENSORFLOW_DEPS)
-  elif hardware == "gpu" or hardware == "cuda12":
-    # For GPU, we assume cuda12 is the default and exclude TPU and cuda13 specific dependencies.
-    hardware_specific_deps_list = TPU_SPECIFIC_DEPS.copy()
-    hardware_specific_deps_list.extend(CUDA13_SPECIFIC_DEPS)
-    hardware_specific_deps_list.extend(TENSORFLOW_DEPS)
-  elif hardware == "cuda13":
-    hardware_specific_deps_list = TPU_SPECIFIC_DEPS.copy()
-    hardware_specific_deps_list.extend(CUDA12_SPECIFIC_DEPS)
-    hardware_specific_deps_list.extend(TENSORFLOW_DEPS)
-  else:
-    logging.warning(f"Unknown hardware {hardware}. Please use tpu or gpu.")
-    return
+@functools.lru_cache(maxsize=None)
+def _compile_dep_patterns(deps: frozenset):
+  """
+  Combines the regex patterns among `deps` (the entries containing "*") into a single
+  compiled alternation, so that a name is matched in one pass. None if there are none.
+  """
+  patterns = sorted(dep for dep in deps if "*" in dep)
+  if not patterns:
+    return None
+  return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
 
-  project_deps = _get_required_dependencies_from_pyproject_toml(pyproject_file)
-
-  exclude_deps = set()
-  for pattern in hardware_specific_deps_list:
-    # Check for literal matches first for efficiency
-    if pattern in project_deps:
-      exclude_deps.add(pattern)
-      continue
-
-    # If it's a pattern, use regex and match
-    if "*" in pattern:
-      regex = re.compile(pattern)
-      for proj_dep in project_deps:
-        if regex.match(proj_dep):
-          exclude_deps.add(proj_dep)
-
-  if exclude_deps:
-    command = [
-      "uv",
-      "remove",
-      "--managed-python",
-      "--resolution=highest",
-      "--no-sync",
-      "--directory",
-      output_dir,
-      *sorted(exclude_deps),
-    ]
-    run_command(command)
+
+def _filter_hardware_specific_deps(
+  hardware: str, seed_lock_file: str, output_dir: str
+) -> str:
+  """
+  Drops the dependencies specific to other hardware from a seed lock file.
+
+  Filtering the lock file before it is added to the project spares a separate
+  `uv remove` afterwards, which would re-resolve the whole project.
+
+  Args:
+      hardware (str): The target hardware for the environment (e.g., 'tpu', 'gpu').
+      seed_lock_file (str): Path to the seed lock file.
+      output_dir (str): Directory where the filtered lock file is written, if needed.
+
+  Returns:
+      str: The path to the filtered seed lock file, or to the original one if
+           there was nothing to drop.
+  """
+  if hardware not in SUPPORTED_HARDWARE:
+    logging.warning(
+      f"Unknown hardware {hardware!r}, no dependencies excluded. "
+      f"Supported: {', '.join(SUPPORTED_HARDWARE_ORDER)}"
+    )
+    return seed_lock_file
+  hardware_specific_deps = _HARDWARE_SPECIFIC_DEPS.get(hardware)
+  if not hardware_specific_deps:
+    # Nothing could be dropped, no need to read the lock file at all
+    return seed_lock_file
+
+  # Names are checked for literal matches first for efficiency, then against
+  # the patterns, i.e. the entries containing "*", all at once
+  dep_patterns = _compile_dep_patterns(hardware_specific_deps)
+
+  kept_lines = []
+  excluded_deps = set()
+  with _open_lock_file(seed_lock_file) as f:
+    # A whole entry is dropped at once, along with its continuation lines (hashes)
+    for entry in _iter_lock_file_entries(f):
+      # Comments, options and blank lines have no project name, and are kept
+      name_match = _REQUIREMENT_NAME_REGEX.match(entry[0])
+      if name_match:
+        # Normalized as per PEP 503, e.g. "Jax_CUDA12.plugin" -> "jax-cuda12-plugin"
+        dep_name = canonicalize_name(name_match.group(1))
+        if dep_name in hardware_specific_deps or (
+          dep_patterns and dep_patterns.match(dep_name)
+        ):
+          excluded_deps.add(dep_name)
+          continue
+      kept_lines.extend(entry)
+
+  if not excluded_deps:
+    return seed_lock_file
+
+  logging.info(
+    f"Excluding dependencies not needed for {hardware}: {', '.join(sorted(excluded_deps))}"
+  )
+  # Absolute, as uv would resolve a relative path against its --directory (output_dir)
+  filtered_lock_file = os.path.abspath(
+    os.path.join(output_dir, _FILTERED_SEED_LOCK_FILENAME)
+  )
+  with open(filtered_lock_file, "w", encoding="utf-8") as f:
+    f.writelines(kept_lines)
+  return filtered_lock_file
 
 
 def calculate_merged_deps(file_paths: list):
@@ -445,14 +522,13 @@ def calculate_merged_deps(file_paths: list):
   # The key is the full dependency string, the value is a list of versions
   dep_groups = defaultdict(list)
   all_python_versions = set()
-  version_pattern = re.compile(r"(\d+\.\d+)")
 
   for path in file_paths:
     if not os.path.isfile(path):
       raise ValueError(f"An versioned pyproject.toml is not found: {path}")
     config = toml.load(path)
     requires_python_str = config.get("project", {}).get("requires-python", "")
-    match = version_pattern.search(requires_python_str)
+    match = _PYTHON_VERSION_REGEX.search(requires_python_str)
     if not match:
       raise ValueError(f"Could not parse Python version from {path}")
 
@@ -524,13 +600,17 @@ def merge_project_toml_files(file_paths: list, output_dir: str, template_path: s
 
   if template_path:
     logging.info(f"Using template {template_path}")
-    shutil.copy(template_path, pyproject_file)
-    # Clear any existing dependencies from the template to start fresh.
-    replace_dependencies_in_project_toml([], pyproject_file)
   else:
-    shutil.copy(file_paths[0], pyproject_file)
+    template_path = file_paths[0]
 
   min_py_version, final_deps = calculate_merged_deps(file_paths)
-  replace_python_requirement_in_project_toml(min_py_version, pyproject_file)
-  replace_dependencies_in_project_toml(final_deps, pyproject_file)
+
+  # Apply all the edits to the template in memory, and write the result once.
+  # Any existing dependencies in the template are replaced by the merged ones.
+  with open(template_path, "r", encoding="utf-8") as f:
+    content = f.read()
+  content = _replace_python_requirement_in_toml_content(min_py_version, content)
+  content = _replace_dependencies_in_toml_content(final_deps, content)
+  with open(pyproject_file, "w", encoding="utf-8") as f:
+    f.write(content)
   return final_deps
@@ -17,30 +17,36 @@ limitations under the License.
 import pytest
 import sys
 
-import seed_env.cli
 
+@pytest.fixture
+def cli():
+  """Imports the CLI module lazily, only for the tests that use it."""
+  import seed_env.cli
 
-def test_cli_prints_help_on_no_args(monkeypatch, capsys):
+  return seed_env.cli
+
+
+def test_cli_prints_help_on_no_args(monkeypatch, capsys, cli):
   # Simulate no arguments
   monkeypatch.setattr(sys, "argv", ["seed_env/cli.py"])
   with pytest.raises(SystemExit):
-    seed_env.cli.main()
+    cli.main()
   captured = capsys.readouterr()
   assert "usage" in captured.out.lower() or "usage" in captured.err.lower()
 
 
-def test_cli_error_on_missing_required(monkeypatch, capsys):
+def test_cli_error_on_missing_required(monkeypatch, capsys, cli):
   # Simulate missing required arguments
   monkeypatch.setattr(
     sys, "argv", ["seed_env/cli.py", "--seed-config", "jax_seed.yaml"]
   )
   with pytest.raises(SystemExit):
-    seed_env.cli.main()
+    cli.main()
   captured = capsys.readouterr()
   assert "error" in captured.out.lower() or "error" in captured.err.lower()
 
 
-def test_cli_local_project(monkeypatch, tmp_path, mocker):
+def test_cli_local_project(monkeypatch, tmp_path, mocker, cli):
   # Simulate local project path
   requirements = tmp_path / "requirements.txt"
   requirements.write_text("foo==1.2.3\n")
@@ -61,11 +67,11 @@ def test_cli_local_project(monkeypatch, tmp_path, mocker):
   mock_seeder = mocker.patch("seed_env.cli.EnvironmentSeeder")
   instance = mock_seeder.return_value
   instance.seed_environment.return_value = None
-  seed_env.cli.main()
+  cli.main()
   assert instance.seed_environment.called
 
 
-def test_cli_remote_project(monkeypatch, mocker):
+def test_cli_remote_project(monkeypatch, mocker, cli):
   # Simulate remote repo
   monkeypatch.setattr(
     sys,
@@ -88,5 +94,24 @@ def test_cli_remote_project(monkeypatch, mocker):
   mock_seeder = mocker.patch("seed_env.cli.EnvironmentSeeder")
   instance = mock_seeder.return_value
   instance.seed_environment.return_value = None
-  seed_env.cli.main()
+  cli.main()
   assert instance.seed_environment.called
+
+
+def test_cli_rejects_unsupported_hardware(monkeypatch, capsys, cli):
+  monkeypatch.setattr(
+    sys,
+    "argv",
+    [
+      "seed_env/cli.py",
+      "--local-requirements",
+      "requirements.txt",
+      "--hardware",
+      "cpu",
+    ],
+  )
+  with pytest.raises(SystemExit):
+    cli.main()
+  captured = capsys.readouterr()
+  # Choices are listed in their display order
+  assert "'tpu', 'gpu', 'cuda12', 'cuda13'" in captured.err
@@ -15,106 +15,128 @@ limitations under the License.
 """
 
 import pytest
-from seed_env.core import EnvironmentSeeder
-
-
-def test_environment_seeder_init_valid():
-  seeder = EnvironmentSeeder(
-    host_name="myproj",
-    host_source_type="local",
-    host_github_org_repo="",
-    host_requirements_file_path="requirements.txt",
-    host_commit="",
-    seed_config="jax_seed.yaml",
-    seed_tag_or_commit="latest",
-    python_version="3.12",
-    hardware="cpu",
-    build_pypi_package=False,
-    output_dir="output",
+from types import SimpleNamespace
+
+
+# Arguments of a valid local-source EnvironmentSeeder, for tests to override
+BASE_KWARGS = {
+  "host_name": "myproj",
+  "host_source_type": "local",
+  "host_github_org_repo": "",
+  "host_requirements_file_path": "requirements.txt",
+  "host_commit": "",
+  "seed_config": "jax_seed.yaml",
+  "seed_tag_or_commit": "latest",
+  "python_version": "3.12",
+  "hardware": "cpu",
+  "build_pypi_package": False,
+  "output_dir": "output",
+}
+
+
+TEMPLATE_TOML = (
+  b'[project]\nname = "myproj"\nreadme = "README.md"\n'
+  b'[tool.hatch.build.targets.wheel]\npackages = ["myproj"]'
+)
+
+
+@pytest.fixture
+def output_dir(tmp_path):
+  """An output directory for the seeder, under the test's own tmp_path."""
+  return str(tmp_path / "output")
+
+
+@pytest.fixture
+def seeder_kwargs(output_dir):
+  """A fresh copy of BASE_KWARGS, writing to output_dir, for a test to modify."""
+  return {**BASE_KWARGS, "output_dir": output_dir}
+
+
+@pytest.fixture(scope="session")
+def template_toml(tmp_path_factory):
+  """A template pyproject.toml, written once and shared by all tests."""
+  path = tmp_path_factory.mktemp("template") / "pyproject.toml"
+  path.write_bytes(TEMPLATE_TOML)
+  return path
+
+
+@pytest.fixture
+def mocked_core(mocker):
+  """Mocks the external dependencies of EnvironmentSeeder.seed_environment."""
+  patches = mocker.patch.multiple(
+    "seed_env.core",
+    download_remote_git_file=mocker.DEFAULT,
+    merge_project_toml_files=mocker.DEFAULT,
+    build_seed_env=mocker.DEFAULT,
+    build_pypi_package=mocker.DEFAULT,
   )
+  return SimpleNamespace(
+    download=patches["download_remote_git_file"],
+    merge=patches["merge_project_toml_files"],
+    build_env=patches["build_seed_env"],
+    build_pypi=patches["build_pypi_package"],
+  )
+
+
+@pytest.mark.parametrize(
+  "override,expected_exc",
+  [
+    ({}, None),
+    ({"seed_config": "not_a_seed.yaml"}, FileNotFoundError),
+  ],
+)
+def test_environment_seeder_init(seeder_kwargs, override, expected_exc):
+  from seed_env.core import EnvironmentSeeder
+
+  seeder_kwargs.update(override)
+  if expected_exc is not None:
+    with pytest.raises(expected_exc):
+      EnvironmentSeeder(**seeder_kwargs)
+    return
+
+  seeder = EnvironmentSeeder(**seeder_kwargs)
   assert seeder.host_name == "myproj"
   assert seeder.seed_config_input == "jax_seed.yaml"
   assert seeder.python_versions == ["3.12"]
 
 
-def test_environment_seeder_init_invalid_seed():
-  with pytest.raises(FileNotFoundError):
-    EnvironmentSeeder(
-      host_name="myproj",
-      host_source_type="local",
-      host_github_org_repo="",
-      host_requirements_file_path="requirements.txt",
-      host_commit="",
-      seed_config="not_a_seed.yaml",
-      seed_tag_or_commit="latest",
-      python_version="3.12",
-      hardware="cpu",
-      build_pypi_package=False,
-      output_dir="output",
-    )
-
-
-def test_seed_environment_remote(mocker, tmp_path):
-  # Mock all external dependencies
-  mock_download = mocker.patch(
-    "seed_env.core.download_remote_git_file",
-    return_value=str(tmp_path / "host.txt"),
-  )
-  mock_merge_project_toml_files = mocker.patch("seed_env.core.merge_project_toml_files")
-  mock_build_env = mocker.patch("seed_env.core.build_seed_env")
-  mock_build_pypi = mocker.patch("seed_env.core.build_pypi_package")
-  # Mock Seeder instance and its method
-  mock_seeder_instance = mocker.Mock()
-  mock_seeder_instance.pypi_project_name = "jax"
-  mock_seeder_instance.github_org_repo = "org/repo"
-  mock_seeder_instance.download_seed_lock_requirement.return_value = str(
-    tmp_path / "seed.txt"
+def test_seed_environment_remote(
+  mocker, mocked_core, seeder_kwargs, tmp_path, template_toml
+):
+  from seed_env.core import EnvironmentSeeder
+
+  mocked_core.download.return_value = str(tmp_path / "host.txt")
+  # Stub Seeder instance; only the download is a mock, for its call to be checked
+  mock_seeder_instance = SimpleNamespace(
+    pypi_project_name="jax",
+    github_org_repo="org/repo",
+    download_seed_lock_requirement=mocker.Mock(return_value=str(tmp_path / "seed.txt")),
   )
   mocker.patch("seed_env.core.Seeder", return_value=mock_seeder_instance)
 
   # 4. Instantiate and run the seeder.
-  template_toml_path = tmp_path / "pyproject.toml"
-  template_toml_path.write_text(
-    '[project]\nname = "myproj"\nreadme = "README.md"\n[tool.hatch.build.targets.wheel]\npackages = ["myproj"]'
-  )
-  seeder = EnvironmentSeeder(
-    host_name="myproj",
+  seeder_kwargs.update(
     host_source_type="remote",
     host_github_org_repo="org/repo",
-    host_requirements_file_path="requirements.txt",
     host_commit="main",
-    seed_config="jax_seed.yaml",
-    seed_tag_or_commit="latest",
-    python_version="3.12",
-    hardware="cpu",
     build_pypi_package=True,
-    output_dir=str(tmp_path / "output"),
-    template_pyproject_toml=str(template_toml_path),
+    template_pyproject_toml=str(template_toml),
   )
+  seeder = EnvironmentSeeder(**seeder_kwargs)
   seeder.seed_environment()
 
   # Assert all mocks were called
-  assert mock_download.called
-  # assert mock_generate_pyproject.called
-  assert mock_build_env.called
-  assert mock_merge_project_toml_files.called
-  assert mock_build_pypi.called
+  assert mocked_core.download.called
+  assert mocked_core.build_env.called
+  assert mocked_core.merge.called
+  assert mocked_core.build_pypi.called
   mock_seeder_instance.download_seed_lock_requirement.assert_called_with("3.12")
 
 
-def test_seed_environment_local_file_not_found(mocker, tmp_path):
-  seeder = EnvironmentSeeder(
-    host_name="myproj",
-    host_source_type="local",
-    host_github_org_repo="",
-    host_requirements_file_path="not_exist.txt",
-    host_commit="",
-    seed_config="jax_seed.yaml",
-    seed_tag_or_commit="latest",
-    python_version="3.12",
-    hardware="cpu",
-    build_pypi_package=False,
-    output_dir=str(tmp_path / "output"),
-  )
+def test_seed_environment_local_file_not_found(seeder_kwargs):
+  from seed_env.core import EnvironmentSeeder
+
+  seeder_kwargs["host_requirements_file_path"] = "not_exist.txt"
+  seeder = EnvironmentSeeder(**seeder_kwargs)
   with pytest.raises(FileNotFoundError):
     seeder.seed_environment()
@@ -41,6 +41,13 @@ def download_dir(tmp_path):
   return tmp_path / "test_downloads"
 
 
+@pytest.fixture(autouse=True)
+def mock_warm_up_remote_git_file():
+  """Keeps the background connection warm-up from sending real requests."""
+  with patch("seed_env.seeder.warm_up_remote_git_file") as mock_warm_up:
+    yield mock_warm_up
+
+
 # --- Tests for Seeder.__init__ ---
 
 
@@ -285,3 +292,22 @@ def test_download_seed_lock_requirement_download_failure_raises_error(
   seeder = Seeder("latest", seeder_config, download_dir)
   with pytest.raises(ValueError, match="Failed to download the seed lock file from"):
     seeder.download_seed_lock_requirement("3.9")
+
+
+@patch("seed_env.seeder.resolve_github_tag_to_commit", return_value="abcdef123")
+@patch("seed_env.seeder.download_remote_git_file")
+def test_download_seed_lock_requirement_warms_up_connection(
+  mock_download_remote_git_file,
+  mock_resolve_github_tag_to_commit,
+  mock_warm_up_remote_git_file,
+  seeder_config,
+  download_dir,
+):
+  """Test the download connection is warmed up with the unresolved tag."""
+  mock_download_remote_git_file.return_value = os.path.join(download_dir, "lock.txt")
+  seeder = Seeder("my-custom-tag", seeder_config, download_dir)
+  seeder.download_seed_lock_requirement("3.12")
+
+  mock_warm_up_remote_git_file.assert_called_once_with(
+    "https://raw.githubusercontent.com/example_org/example_repo/my-custom-tag/seed_lock_py3_12.txt"
+  )
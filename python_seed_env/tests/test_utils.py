@@ -15,7 +15,11 @@ limitations under the License.
 """
 
 import os
+import re
+import subprocess
+import time
 import pytest
+import requests
 
 from seed_env.utils import (
   valid_python_version_format,
@@ -36,29 +40,56 @@ from seed_env.uv_utils import (
   _read_pinned_deps_from_a_req_lock_file,
   _convert_pinned_deps_to_lower_bound,
   replace_dependencies_in_project_toml,
+  merge_project_toml_files,
+  _filter_hardware_specific_deps,
+  _HARDWARE_SPECIFIC_DEPS,
 )
+from seed_env.config import SUPPORTED_HARDWARE
+
+
+@pytest.fixture(autouse=True)
+def clear_request_caches():
+  yield
+  get_latest_project_version_from_pypi.cache_clear()
+  resolve_github_tag_to_commit.cache_clear()
+  is_valid_commit_hash.cache_clear()
 
 
 def test_download_remote_git_file(tmp_path, mocker):
   url = "https://raw.githubusercontent.com/python/cpython/main/README.rst"
   output_dir = tmp_path
-  mock_response = mocker.Mock()
-  mock_response.content = b"hello world"
-  mock_response.raise_for_status = mocker.Mock()
-  mocker.patch("seed_env.utils.requests.get", return_value=mock_response)
+  mock_response = mocker.MagicMock()
+  mock_response.__enter__.return_value = mock_response
+  mock_response.iter_content.return_value = [b"hello ", b"world"]
+  mocker.patch("seed_env.utils.HTTP_SESSION.get", return_value=mock_response)
   out_path = download_remote_git_file(url, str(output_dir))
   assert os.path.isfile(out_path)
   with open(out_path, "rb") as f:
     assert f.read() == b"hello world"
 
 
+def test_download_remote_git_file_uses_cache(tmp_path, mocker, monkeypatch):
+  monkeypatch.setenv("SEED_ENV_CACHE_DIR", str(tmp_path / "cache"))
+  url = f"https://raw.githubusercontent.com/org/repo/{'a' * 40}/requirements.txt"
+  mock_response = mocker.MagicMock()
+  mock_response.__enter__.return_value = mock_response
+  mock_response.iter_content.return_value = [b"foo==1.0\n"]
+  mock_get = mocker.patch("seed_env.utils.HTTP_SESSION.get", return_value=mock_response)
+
+  first_path = download_remote_git_file(url, str(tmp_path / "first"))
+  second_path = download_remote_git_file(url, str(tmp_path / "second"))
+  mock_get.assert_called_once()
+  with open(first_path, "rb") as f1, open(second_path, "rb") as f2:
+    assert f1.read() == f2.read() == b"foo==1.0\n"
+
+
 def test_get_latest_project_version_from_pypi(mocker):
   mock_response = mocker.Mock()
   mock_response.raise_for_status = mocker.Mock()
   mock_response.json.return_value = {
-    "releases": {"1.0.0": {}, "2.0.0": {}, "1.5.0": {}}
+    "versions": ["1.0.0", "2.0.0", "1.5.0", "1.10.0rc1", "2.1.0.dev20240501"]
   }
-  mocker.patch("seed_env.utils.requests.get", return_value=mock_response)
+  mocker.patch("seed_env.utils.HTTP_SESSION.get", return_value=mock_response)
   version = get_latest_project_version_from_pypi("dummy")
   assert version == "2.0.0"
 
@@ -67,25 +98,49 @@ def test_resolve_github_tag_to_commit(mocker):
   mock_response = mocker.Mock()
   mock_response.raise_for_status = mocker.Mock()
   mock_response.json.return_value = {"object": {"sha": "abc123"}}
-  mocker.patch("seed_env.utils.requests.get", return_value=mock_response)
+  mocker.patch("seed_env.utils.HTTP_SESSION.get", return_value=mock_response)
   sha = resolve_github_tag_to_commit("org/repo", "v1.0.0")
   assert sha == "abc123"
 
 
+def test_resolve_github_tag_to_commit_is_cached(mocker):
+  mock_response = mocker.Mock()
+  mock_response.raise_for_status = mocker.Mock()
+  mock_response.json.return_value = {"object": {"sha": "def456"}}
+  mock_get = mocker.patch("seed_env.utils.HTTP_SESSION.get", return_value=mock_response)
+  assert resolve_github_tag_to_commit("org/repo", "v2.0.0") == "def456"
+  assert resolve_github_tag_to_commit("org/repo", "v2.0.0") == "def456"
+  mock_get.assert_called_once()
+
+
 def test_is_valid_commit_hash_true(mocker):
   mock_response = mocker.Mock()
   mock_response.status_code = 200
-  mocker.patch("seed_env.utils.requests.get", return_value=mock_response)
+  mocker.patch("seed_env.utils.HTTP_SESSION.head", return_value=mock_response)
   assert is_valid_commit_hash("org/repo", "a" * 40) is True
 
 
-def test_is_valid_commit_hash_false(mocker):
+@pytest.mark.parametrize("status_code", [404, 422])
+def test_is_valid_commit_hash_false(mocker, status_code):
   mock_response = mocker.Mock()
-  mock_response.status_code = 404
-  mocker.patch("seed_env.utils.requests.get", return_value=mock_response)
+  mock_response.status_code = status_code
+  mocker.patch("seed_env.utils.HTTP_SESSION.head", return_value=mock_response)
   assert is_valid_commit_hash("org/repo", "b" * 40) is False
 
 
+def test_is_valid_commit_hash_server_error_not_cached(mocker):
+  error_response = mocker.Mock()
+  error_response.status_code = 503
+  ok_response = mocker.Mock()
+  ok_response.status_code = 200
+  mocker.patch(
+    "seed_env.utils.HTTP_SESSION.head", side_effect=[error_response, ok_response]
+  )
+  with pytest.raises(requests.HTTPError):
+    is_valid_commit_hash("org/repo", "c" * 40)
+  assert is_valid_commit_hash("org/repo", "c" * 40) is True
+
+
 @pytest.mark.parametrize(
   "commit_hash,expected",
   [
@@ -107,6 +162,16 @@ def test_generate_minimal_pyproject_toml(tmp_path):
   assert 'requires-python = "==3.12.*"' in content
 
 
+def test_generate_minimal_pyproject_toml_unchanged_file_not_rewritten(tmp_path):
+  path = generate_minimal_pyproject_toml("myproj", "3.12", str(tmp_path))
+  os.utime(path, ns=(0, 0))
+  assert generate_minimal_pyproject_toml("myproj", "3.12", str(tmp_path)) == path
+  assert os.stat(path).st_mtime_ns == 0
+
+  generate_minimal_pyproject_toml("myproj", "3.11", str(tmp_path))
+  assert os.stat(path).st_mtime_ns != 0
+
+
 def test_generate_minimal_pyproject_toml_invalid_version(tmp_path):
   with pytest.raises(ValueError):
     generate_minimal_pyproject_toml("myproj", "3.12.1", str(tmp_path))
@@ -142,9 +207,6 @@ version = "0.1.0"
   mock_lock_to_lower_bound_project = mocker.patch(
     "seed_env.uv_utils.lock_to_lower_bound_project"
   )
-  mock_remove_hardware_specific_deps = mocker.patch(
-    "seed_env.uv_utils._remove_hardware_specific_deps"
-  )
 
   build_seed_env(
     str(host_requirements_file),
@@ -152,14 +214,13 @@ version = "0.1.0"
     str(output_dir),
     hardware,
     host_lock_file_name,
+    resolve_lowest=True,
   )
 
   # Should call run_command at least once
   assert mock_run_command.called
   assert mock_os_remove.called
   assert mock_lock_to_lower_bound_project.called
-  # Check for the expected uv remove command
-  assert mock_remove_hardware_specific_deps.call_count == 1
 
   # Collect all commands passed to run_command
   commands = [call.args[0] for call in mock_run_command.call_args_list]
@@ -227,12 +288,215 @@ version = "0.1.0"
   ] in commands
 
 
+def test_build_seed_env_skips_lowest_resolution_by_default(mocker, tmp_path):
+  host_requirements_file = tmp_path / "host.txt"
+  seed_lock_file = tmp_path / "seed.txt"
+  host_requirements_file.write_text("foo==1.2.3\n")
+  seed_lock_file.write_text("bar==4.5.6\n")
+  output_dir = tmp_path / "output"
+  output_dir.mkdir()
+  (output_dir / "pyproject.toml").write_text('[project]\nname = "dummy"\n')
+
+  uv_lock_file = output_dir / "uv.lock"
+
+  def _run_command(command):
+    # uv add/lock (re)write the project's lock file
+    if command[1] in ("add", "lock"):
+      uv_lock_file.write_text("")
+
+  mock_run_command = mocker.patch(
+    "seed_env.uv_utils.run_command", side_effect=_run_command
+  )
+  mock_lock_to_lower_bound_project = mocker.patch(
+    "seed_env.uv_utils.lock_to_lower_bound_project"
+  )
+
+  build_seed_env(
+    str(host_requirements_file),
+    str(seed_lock_file),
+    str(output_dir),
+    "tpu",
+    "host_lock.txt",
+  )
+
+  assert mock_lock_to_lower_bound_project.called
+  # The lock of the seed pins would not match the lower-bound pyproject.toml
+  assert not uv_lock_file.exists()
+  commands = [call.args[0] for call in mock_run_command.call_args_list]
+  assert [command[:2] for command in commands] == [
+    ["uv", "add"],
+    ["uv", "add"],
+    ["uv", "export"],
+  ]
+  assert "--resolution=highest" in commands[-1]
+
+
+def test_filter_hardware_specific_deps(monkeypatch, tmp_path):
+  monkeypatch.chdir(tmp_path)
+  seed_lock_file = tmp_path / "seed.txt"
+  seed_lock_file.write_text(
+    "# This file was autogenerated\n"
+    "foo==1.0.0\n"
+    "libtpu==0.0.1\n"
+    "nvidia-cublas-cu12==12.0.0 ; sys_platform == 'linux'\n"
+    "tensorflow==2.0.0\n"
+  )
+
+  # A relative output dir
+  filtered_lock_file = _filter_hardware_specific_deps("tpu", str(seed_lock_file), ".")
+
+  assert os.path.isabs(filtered_lock_file)
+  assert os.path.samefile(filtered_lock_file, tmp_path / "seed_lock_filtered.txt")
+  with open(filtered_lock_file, "r", encoding="utf-8") as f:
+    assert f.read() == "# This file was autogenerated\nfoo==1.0.0\nlibtpu==0.0.1\n"
+
+
+def test_filter_hardware_specific_deps_with_hashes(tmp_path):
+  seed_lock_file = tmp_path / "seed.txt"
+  seed_lock_file.write_text(
+    "foo==1.0.0 \\\n"
+    "    --hash=sha256:aaaa \\\n"
+    "    --hash=sha256:bbbb\n"
+    "libtpu==0.0.1 ; sys_platform == 'linux' \\\n"
+    "    --hash=sha256:cccc \\\n"
+    "    --hash=sha256:dddd\n"
+    "bar==2.0.0 \\\n"
+    "    --hash=sha256:eeee\n"
+  )
+
+  filtered_lock_file = _filter_hardware_specific_deps(
+    "gpu", str(seed_lock_file), str(tmp_path)
+  )
+
+  with open(filtered_lock_file, "r", encoding="utf-8") as f:
+    assert f.read() == (
+      "foo==1.0.0 \\\n"
+      "    --hash=sha256:aaaa \\\n"
+      "    --hash=sha256:bbbb\n"
+      "bar==2.0.0 \\\n"
+      "    --hash=sha256:eeee\n"
+    )
+
+
+def test_build_seed_env_removes_filtered_seed_lock_on_failure(mocker, tmp_path):
+  host_requirements_file = tmp_path / "host.txt"
+  seed_lock_file = tmp_path / "seed.txt"
+  host_requirements_file.write_text("foo==1.2.3\n")
+  seed_lock_file.write_text("bar==4.5.6\nlibtpu==0.0.1\n")
+  output_dir = tmp_path / "output"
+  output_dir.mkdir()
+  (output_dir / "pyproject.toml").write_text('[project]\nname = "dummy"\n')
+
+  mocker.patch(
+    "seed_env.uv_utils.run_command",
+    side_effect=subprocess.CalledProcessError(1, ["uv", "add"]),
+  )
+
+  with pytest.raises(subprocess.CalledProcessError):
+    build_seed_env(
+      str(host_requirements_file),
+      str(seed_lock_file),
+      str(output_dir),
+      "gpu",
+      "host_lock.txt",
+    )
+
+  assert not (output_dir / "seed_lock_filtered.txt").exists()
+
+
+def test_filter_hardware_specific_deps_normalizes_names(tmp_path):
+  seed_lock_file = tmp_path / "seed.txt"
+  seed_lock_file.write_text(
+    "foo==1.0.0\nJax_CUDA12.Plugin[with-cuda]==0.4.0\nnvidia_cublas_cu12==12.0.0\n"
+  )
+
+  filtered_lock_file = _filter_hardware_specific_deps(
+    "tpu", str(seed_lock_file), str(tmp_path)
+  )
+
+  with open(filtered_lock_file, "r", encoding="utf-8") as f:
+    assert f.read() == "foo==1.0.0\n"
+
+
+def test_filter_hardware_specific_deps_empty_exclusions(mocker, tmp_path):
+  mocker.patch.dict("seed_env.uv_utils._HARDWARE_SPECIFIC_DEPS", {"tpu": frozenset()})
+
+  # Never created, as it must not be read at all
+  seed_lock_file = str(tmp_path / "seed.txt")
+  assert _filter_hardware_specific_deps("tpu", seed_lock_file, str(tmp_path)) == (
+    seed_lock_file
+  )
+
+
+def test_hardware_specific_deps_cover_supported_hardware():
+  for hardware in SUPPORTED_HARDWARE:
+    assert _HARDWARE_SPECIFIC_DEPS.get(hardware)
+
+
+def test_filter_hardware_specific_deps_unknown_hardware(tmp_path):
+  seed_lock_file = tmp_path / "seed.txt"
+  seed_lock_file.write_text("libtpu==0.0.1\ntensorflow==2.0.0\n")
+
+  filtered_lock_file = _filter_hardware_specific_deps(
+    "cpu", str(seed_lock_file), str(tmp_path)
+  )
+
+  assert filtered_lock_file == str(seed_lock_file)
+
+
+def test_filter_hardware_specific_deps_nothing_to_exclude(tmp_path):
+  seed_lock_file = tmp_path / "seed.txt"
+  seed_lock_file.write_text("foo==1.0.0\nlibtpu==0.0.1\n")
+
+  filtered_lock_file = _filter_hardware_specific_deps(
+    "tpu", str(seed_lock_file), str(tmp_path)
+  )
+
+  assert filtered_lock_file == str(seed_lock_file)
+
+
 def test_convert_deps_to_lower_bound():
   pinned = ["foo==1.2.3", "bar==4.5.6"]
   expected = ["foo>=1.2.3", "bar>=4.5.6"]
   assert _convert_pinned_deps_to_lower_bound(pinned) == expected
 
 
+def test_convert_deps_to_lower_bound_keeps_markers():
+  pinned = [
+    "foo==1.2.3 ; python_version == '3.12'",
+    "baz @ git+https://repo.git ; python_version == '3.12'",
+  ]
+  expected = [
+    "foo>=1.2.3 ; python_version == '3.12'",
+    "baz @ git+https://repo.git ; python_version == '3.12'",
+  ]
+  assert _convert_pinned_deps_to_lower_bound(pinned) == expected
+
+
+def test_convert_deps_to_lower_bound_matches_regex_reference(tmp_path):
+  # A large synthetic lock file, mixing plain pins, extras, markers and direct references
+  lines = []
+  for i in range(10_000):
+    if i % 4 == 0:
+      lines.append(f"pkg-{i}==1.{i}.0")
+    elif i % 4 == 1:
+      lines.append(f"pkg-{i}[extra]=={i}.0.post1 ; python_version == '3.12'")
+    elif i % 4 == 2:
+      lines.append(f"pkg-{i} @ git+https://example.com/pkg-{i}.git ; os_name == 'nt'")
+    else:
+      lines.append(f"# via pkg-{i}")
+  lock_file = tmp_path / "lock.txt"
+  lock_file.write_text("\n".join(lines) + "\n")
+
+  # Reference implementation: regex-based, converting the pin before any markers
+  pin_regex = re.compile(r"^([^;]*?)==")
+  pinned = _read_pinned_deps_from_a_req_lock_file(str(lock_file))
+  expected = [pin_regex.sub(r"\1>=", dep, count=1) for dep in pinned]
+
+  assert len(pinned) == 7_500
+  assert _convert_pinned_deps_to_lower_bound(pinned) == expected
+
+
 def test_read_requirements_lock_file(tmp_path):
   content = "foo==1.2.3\nbar==4.5.6\n# comment\nbaz @ git+https://repo.git\n"
   file = tmp_path / "lock.txt"
@@ -261,6 +525,38 @@ dependencies = [
   assert "bar>=4.5.6" in updated
 
 
+def test_merge_project_toml_files(tmp_path):
+  toml_template = """[project]
+name = "demo"
+requires-python = "=={python_version}.*"
+dependencies = [
+    "foo>=1.2.3",
+    "{extra_dep}",
+]
+"""
+  file_paths = []
+  for python_version, extra_dep in (("3.11", "bar>=1.0"), ("3.12", "bar>=2.0")):
+    versioned_dir = tmp_path / python_version
+    versioned_dir.mkdir()
+    toml_file = versioned_dir / "pyproject.toml"
+    toml_file.write_text(
+      toml_template.format(python_version=python_version, extra_dep=extra_dep)
+    )
+    file_paths.append(str(toml_file))
+
+  final_deps = merge_project_toml_files(file_paths, str(tmp_path), None)
+  assert final_deps == [
+    "bar>=1.0 ; python_version == '3.11'",
+    "bar>=2.0 ; python_version >= '3.12'",
+    "foo>=1.2.3",
+  ]
+  merged = (tmp_path / "pyproject.toml").read_text()
+  assert 'requires-python = ">=3.11"' in merged
+  assert 'name = "demo"' in merged
+  for dep in final_deps:
+    assert f'"{dep}"' in merged
+
+
 @pytest.mark.parametrize(
   "version,expected",
   [
@@ -314,6 +610,24 @@ def test_run_command_failure(tmp_path):
     run_command(["false"], cwd=str(tmp_path), check=True)
 
 
+def test_run_command_timeout(tmp_path):
+  with pytest.raises(subprocess.TimeoutExpired):
+    run_command(["sleep", "10"], cwd=str(tmp_path), timeout=0.1)
+
+
+def test_run_command_timeout_kills_child_processes(tmp_path):
+  start = time.monotonic()
+  with pytest.raises(subprocess.TimeoutExpired):
+    run_command(["sh", "-c", "sleep 5 & sleep 30"], cwd=str(tmp_path), timeout=0.5)
+  # The background sleep, holding the output pipe, was killed too
+  assert time.monotonic() - start < 5
+
+
+def test_run_command_non_utf8_output(tmp_path):
+  result = run_command(["printf", "ok\\377\\n"], cwd=str(tmp_path), capture_output=True)
+  assert result.stdout == "ok\ufffd\n"
+
+
 def test_build_pypi_package(tmp_path):
   # Create a minimal pyproject.toml
   pyproject_content = """